@@ -1,3 +1,3 @@
-from digikey.v4.api import DigikeyApi
+from digikey.v4.api import DigikeyApi, AsyncDigikeyApi
 
 name = 'digikey'
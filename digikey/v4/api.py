@@ -1,171 +1,788 @@
 import os
+import asyncio
+import collections
+import collections.abc
+import copy
+import functools
 import logging
+import ssl
+import threading
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from distutils.util import strtobool
+from email.utils import parsedate_to_datetime
+from types import MappingProxyType
+
+import certifi
+import requests
+import urllib3
+from urllib3.util.retry import Retry
+
 import digikey.oauth.oauth2
 from digikey.exceptions import DigikeyError
 from digikey.v4.productinformation import (KeywordRequest, KeywordResponse, ProductDetails, DigiReelPricing,
                                            )
 from digikey.v4.productinformation.rest import ApiException
 from digikey.v4.ordersupport import (OrderStatusResponse, SalesOrderHistoryItem)
+from digikey.v4.ordersupport.rest import ApiException as OrderSupportApiException
 from digikey.v4.batchproductdetails import (BatchProductDetailsRequest, BatchProductDetailsResponse)
+from digikey.v4.batchproductdetails.rest import ApiException as BatchProductDetailsApiException
 
 logger = logging.getLogger(__name__)
 
-
-class DigikeyApiWrapper(object):
-    def __init__(self, wrapped_function, module):
-        self.sandbox = False
-
-        apinames = {
-            digikey.v4.productinformation: 'products',
-            digikey.v4.ordersupport: 'OrderDetails',
-            digikey.v4.batchproductdetails: 'BatchSearch'
-        }
-
-        apiclasses = {
-            digikey.v4.productinformation: digikey.v4.productinformation.ProductSearchApi,
-            digikey.v4.ordersupport: digikey.v4.ordersupport.OrderDetailsApi,
-            digikey.v4.batchproductdetails: digikey.v4.batchproductdetails.BatchSearchApi
-        }
-
-        apiname = apinames[module]
-        apiclass = apiclasses[module]
+_CREDENTIALS_ERROR = 'Please provide a valid client_id and client_secret, ' \
+                     'or set DIGIKEY_CLIENT_ID and DIGIKEY_CLIENT_SECRET in your env setup'
+
+# Each generated API module defines its own ApiException
+_API_EXCEPTIONS = (ApiException, OrderSupportApiException, BatchProductDetailsApiException)
+
+# API name, API class and configuration class for each supported API module
+_MODULE_TABLE = MappingProxyType({
+    digikey.v4.productinformation: ('products',
+                                    digikey.v4.productinformation.ProductSearchApi,
+                                    digikey.v4.productinformation.Configuration),
+    digikey.v4.ordersupport: ('OrderDetails',
+                              digikey.v4.ordersupport.OrderDetailsApi,
+                              digikey.v4.ordersupport.Configuration),
+    digikey.v4.batchproductdetails: ('BatchSearch',
+                                     digikey.v4.batchproductdetails.BatchSearchApi,
+                                     digikey.v4.batchproductdetails.Configuration),
+})
+
+# Base url per (module, sandbox), the sandbox API returns test data
+_HOSTS = MappingProxyType({
+    (module, sandbox): f"https://{'sandbox-api' if sandbox else 'api'}.digikey.com/{apiname}/v4"
+    for module, (apiname, *_) in _MODULE_TABLE.items()
+    for sandbox in (False, True)
+})
+
+# Wrapped function name and API module of each public endpoint
+_ENDPOINTS = MappingProxyType({
+    'keyword_search': ('keyword_search_with_http_info', digikey.v4.productinformation),
+    'product_details': ('product_details_with_http_info', digikey.v4.productinformation),
+    'digi_reel_pricing': ('digi_reel_pricing_with_http_info', digikey.v4.productinformation),
+    'suggested_parts': ('suggested_parts_with_http_info', digikey.v4.productinformation),
+    'status_salesorder_id': ('order_status_with_http_info', digikey.v4.ordersupport),
+    'salesorder_history': ('order_history_with_http_info', digikey.v4.ordersupport),
+    'batch_product_details': ('batch_product_details_with_http_info', digikey.v4.batchproductdetails),
+})
+
+# Endpoints that only look up data, their responses are cached and revalidated using ETags
+_CONDITIONAL_FUNCTIONS = frozenset({
+    'product_details_with_http_info',
+    'suggested_parts_with_http_info',
+    'digi_reel_pricing_with_http_info',
+    'order_status_with_http_info',
+})
+
+# Access tokens shared by all wrappers, keyed by (client_id, sandbox)
+_TOKEN_CACHE: t.Dict[t.Tuple[str, bool], digikey.oauth.oauth2.Oauth2Token] = {}
+_TOKEN_LOCK = threading.Lock()
+
+
+def _get_or_refresh_token(client_id, client_secret, storage_path, sandbox) -> digikey.oauth.oauth2.Oauth2Token:
+    """
+    Returns the cached access token for this client, only going through the TokenHandler (token storage and
+    possibly an OAuth refresh) when no token is cached yet or the cached one has expired. The stored expiry
+    already includes a one minute safety margin.
+    """
+    key = (client_id, sandbox)
+    with _TOKEN_LOCK:
+        token = _TOKEN_CACHE.get(key)
+        if token is None or token.expired():
+            token = digikey.oauth.oauth2.TokenHandler(a_id=client_id, a_secret=client_secret,
+                                                      a_token_storage_path=storage_path,
+                                                      version=3, sandbox=sandbox).get_access_token()
+            _TOKEN_CACHE[key] = token
+        return token
+
+
+class _RateState(object):
+    """
+    Client side rate limiter shared by all API wrappers.
+
+    Calls are paused when the X-RateLimit headers report that the remaining requests are nearly used up, until the
+    reported reset time. A sliding window of recent calls is kept as a fallback to stay below the burst limit when
+    the API does not return any rate limit headers.
+    """
+    # Digikey allows 120 requests per minute per client
+    requests_per_minute = 120
+    window_seconds = 60.0
+    # Never block a call for longer than this, i.e. when the daily quota is used up
+    max_wait = 60.0
+
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset_at = 0.0
+        # Reset time of the last exhausted quota that was reported, so it is only logged once
+        self.warned_reset_at = None
+        self.lock = threading.Lock()
+        self.window = collections.deque()
+
+    def update(self, limit, remaining, reset):
+        with self.lock:
+            self.limit = limit
+            self.remaining = remaining
+            if reset is not None:
+                try:
+                    reset = float(reset)
+                except ValueError:
+                    return
+                # The reset header is either an epoch timestamp or a number of seconds from now, an epoch in the
+                # past means the quota was already reset
+                if reset > 1e9:
+                    reset = max(0.0, reset - time.time())
+                self.reset_at = time.monotonic() + reset
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = 0.0
+
+            if self.reset_at <= now:
+                self.remaining = None
+
+            if self.remaining is not None and self.limit is not None \
+                    and self.remaining <= max(2, 0.1 * self.limit):
+                delay = self.reset_at - now
+            else:
+                while self.window and now - self.window[0] >= self.window_seconds:
+                    self.window.popleft()
+                if len(self.window) >= self.requests_per_minute:
+                    delay = self.window_seconds - (now - self.window[0])
+
+            if delay > self.max_wait:
+                if self.warned_reset_at != self.reset_at:
+                    self.warned_reset_at = self.reset_at
+                    logger.warning('API rate limit reached, reset in %.0f seconds', delay)
+                else:
+                    logger.debug('API rate limit reached, reset in %.0f seconds', delay)
+                delay = 0.0
+            self.window.append(now + delay)
+
+        if delay > 0:
+            logger.info('Approaching API rate limit, waiting %.1f seconds', delay)
+            time.sleep(delay)
+
+
+class _ConcurrencyController(object):
+    """
+    Limits the number of concurrent API calls of a client, using additive increase / multiplicative decrease. The
+    limit grows by 0.5 while the average latency of the last calls stays within the target latency, and is halved
+    when calls get slower than that (measured over at least min_samples calls) or are rejected by the API.
+    """
+    min_concurrency = 1
+    max_concurrency = 16
+    target_latency = 1.5
+    window_size = 32
+    min_samples = 16
+
+    def __init__(self, concurrency=4):
+        self.concurrency = float(concurrency)
+        self.in_flight = 0
+        self.latencies = collections.deque(maxlen=self.window_size)
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.concurrency):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency, throttled=False):
+        with self.condition:
+            self.in_flight -= 1
+            self.latencies.append(latency)
+
+            slow = sum(self.latencies) / len(self.latencies) > self.target_latency
+
+            if throttled or (slow and len(self.latencies) >= self.min_samples):
+                self.concurrency = max(self.min_concurrency, self.concurrency * 0.5)
+                # Start measuring again at the new concurrency
+                self.latencies.clear()
+            elif not slow:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 0.5)
+
+            self.condition.notify_all()
+
+
+class _ClientState(object):
+    """
+    Rate limiting and concurrency state of a single client. Digikey applies its limits per client and not per
+    endpoint, so all wrappers of the same (client_id, sandbox) share one state.
+    """
+    def __init__(self):
+        self.rate_state = _RateState()
+        self.concurrency = _ConcurrencyController()
+
+        # Cleared while the API is rate limiting us, only one call at a time then retries (probes) the API
+        self.clear_to_send = threading.Event()
+        self.clear_to_send.set()
+        self.probe_lock = threading.Lock()
+        # Monotonic time at which the probing call retries
+        self.retry_at = 0.0
+
+    def wait_clear_to_send(self, timeout):
+        # Follow the delays of the probing call, but do not wait longer than timeout after its retry is due
+        while not self.clear_to_send.is_set():
+            remaining = self.retry_at + timeout - time.monotonic()
+            if remaining <= 0:
+                return
+            self.clear_to_send.wait(remaining)
+
+
+# Client states keyed by (client_id, sandbox)
+_CLIENT_STATES: t.Dict[t.Tuple[str, bool], _ClientState] = {}
+_CLIENT_STATES_LOCK = threading.Lock()
+
+
+def _get_client_state(client_id, sandbox) -> _ClientState:
+    with _CLIENT_STATES_LOCK:
+        state = _CLIENT_STATES.get((client_id, sandbox))
+        if state is None:
+            state = _CLIENT_STATES[(client_id, sandbox)] = _ClientState()
+        return state
+
+
+class _RequestHeaders(collections.abc.MutableMapping):
+    """
+    Replaces the default headers of a generated ApiClient, so extra headers (i.e. If-None-Match) can be sent with a
+    single request of the current thread without affecting concurrent calls on the same client.
+    """
+    def __init__(self, headers):
+        self._headers = dict(headers)
+        self._local = threading.local()
+
+    def _merged(self):
+        extra = getattr(self._local, 'headers', None)
+        return {**self._headers, **extra} if extra else self._headers
+
+    def __getitem__(self, key):
+        return self._merged()[key]
+
+    def __setitem__(self, key, value):
+        self._headers[key] = value
+
+    def __delitem__(self, key):
+        del self._headers[key]
+
+    def __iter__(self):
+        return iter(self._merged())
+
+    def __len__(self):
+        return len(self._merged())
+
+    @contextmanager
+    def extra(self, headers):
+        self._local.headers = headers
+        try:
+            yield
+        finally:
+            self._local.headers = None
+
+
+class _DigikeyApiWrapper(object):
+    __slots__ = ('sandbox', '_state', '_digikeyApiToken', '_cached_access_token', '_api_instance',
+                 '_request_headers', '_etag_cache', '_etag_lock', 'authorization', 'x_digikey_client_id',
+                 '_client_secret', '_storage_path', 'wrapped_function_name', '_func')
+
+    # Connection pool shared by all wrappers, so keep-alive connections are reused across API calls
+    _pool_manager = urllib3.PoolManager(
+        num_pools=4,
+        maxsize=16,
+        block=False,
+        cert_reqs=ssl.CERT_REQUIRED,
+        ca_certs=certifi.where(),
+        retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 504), raise_on_status=False)
+    )
+
+    # Retry rate limited calls with exponential backoff: base_delay * 2^attempt seconds, up to max_delay
+    max_retries = 5
+    retry_base_delay = 0.5
+    retry_max_delay = 30.0
+    # A Retry-After header is honored in full, calls give up right away when it asks to wait longer than this
+    retry_after_max_delay = 300.0
+
+    # Maximum number of responses kept per wrapper for conditional requests
+    etag_cache_size = 1024
+
+    def __init__(self, wrapped_function_name, module, client_id, client_secret, storage_path, client_sandbox=False,
+                 session=None):
+        self.sandbox = client_sandbox
+
+        if not client_id or not client_secret:
+            raise DigikeyError(_CREDENTIALS_ERROR)
+
+        _, apiclass, configuration_class = _MODULE_TABLE[module]
+        self._state = _get_client_state(client_id, bool(self.sandbox))
 
         # Configure API key authorization: apiKeySecurity
-        configuration = module.Configuration()
-        configuration.api_key['X-DIGIKEY-Client-Id'] = os.getenv('DIGIKEY_CLIENT_ID')
-
-        # Return quietly if no clientid has been set to prevent errors when importing the module
-        if os.getenv('DIGIKEY_CLIENT_ID') is None or os.getenv('DIGIKEY_CLIENT_SECRET') is None:
-            raise DigikeyError('Please provide a valid DIGIKEY_CLIENT_ID and DIGIKEY_CLIENT_SECRET in your env setup')
+        configuration = configuration_class()
+        configuration.api_key['X-DIGIKEY-Client-Id'] = client_id
 
-        # Use normal API by default, if DIGIKEY_CLIENT_SANDBOX is True use sandbox API
-        configuration.host = 'https://api.digikey.com/' + apiname + '/v4'
-        try:
-            if bool(strtobool(os.getenv('DIGIKEY_CLIENT_SANDBOX'))):
-                configuration.host = 'https://sandbox-api.digikey.com/' + apiname + '/v4'
-                self.sandbox = True
-        except (ValueError, AttributeError):
-            pass
+        # Use normal API by default, if client_sandbox is True use sandbox API
+        configuration.host = _HOSTS[(module, bool(self.sandbox))]
 
         # Uncomment below to setup prefix (e.g. Bearer) for API key, if needed
         # configuration.api_key_prefix['X-DIGIKEY-Client-Id'] = 'Bearer'
 
         # Configure OAuth2 access token for authorization: oauth2AccessCodeSecurity
-        self._digikeyApiToken = digikey.oauth.oauth2.TokenHandler(version=3, sandbox=self.sandbox).get_access_token()
+        self._digikeyApiToken = _get_or_refresh_token(client_id, client_secret, storage_path, self.sandbox)
         configuration.access_token = self._digikeyApiToken.access_token
 
+        custom_transport = session is not None and self._apply_session(configuration, session)
+
         # create an instance of the API class
         self._api_instance = apiclass(module.ApiClient(configuration))
+        # The generated client builds its own pool manager for a proxy or custom TLS settings
+        if not configuration.proxy and not custom_transport:
+            if session is not None:
+                pool_manager = session.get_adapter('https://').poolmanager
+            else:
+                pool_manager = self._pool_manager
+            self._api_instance.api_client.rest_client.pool_manager = pool_manager
+        self._request_headers = _RequestHeaders(self._api_instance.api_client.default_headers)
+        self._api_instance.api_client.default_headers = self._request_headers
+
+        # Cached (etag, response) pairs keyed by the call arguments, in least recently used order
+        self._etag_cache = collections.OrderedDict() if wrapped_function_name in _CONDITIONAL_FUNCTIONS else None
+        self._etag_lock = threading.Lock()
 
         # Populate reused ids
         self.authorization = self._digikeyApiToken.get_authorization()
-        self.x_digikey_client_id = os.getenv('DIGIKEY_CLIENT_ID')
+        self._cached_access_token = self._digikeyApiToken.access_token
+        self.x_digikey_client_id = client_id
+        self._client_secret = client_secret
+        self._storage_path = storage_path
 
-        self.wrapped_function = wrapped_function
+        self.wrapped_function_name = wrapped_function_name
+        self._func = getattr(self._api_instance, wrapped_function_name)
 
     @staticmethod
-    def _remaining_requests(header, api_limits):
-        try:
-            rate_limit = header['X-RateLimit-Limit']
-            rate_limit_rem = header['X-RateLimit-Remaining']
-
-            if api_limits is not None and type(api_limits) == dict:
-                api_limits['api_requests_limit'] = int(rate_limit)
-                api_limits['api_requests_remaining'] = int(rate_limit_rem)
-
-            logger.debug('Requests remaining: [{}/{}]'.format(rate_limit_rem, rate_limit))
-        except (KeyError, ValueError) as e:
-            logger.debug(f'No api limits returned -> {e.__class__.__name__}: {e}')
-            if api_limits is not None and type(api_limits) == dict:
+    def _apply_session(configuration, session):
+        """Copies the proxy and TLS settings of a requests session, returns True when any of them is set"""
+        proxy = session.proxies.get('https') or session.proxies.get('all')
+        if proxy:
+            configuration.proxy = proxy
+
+        if session.verify is False:
+            configuration.verify_ssl = False
+        elif isinstance(session.verify, str):
+            configuration.ssl_ca_cert = session.verify
+
+        if isinstance(session.cert, str):
+            configuration.cert_file = session.cert
+        elif session.cert is not None:
+            configuration.cert_file, configuration.key_file = session.cert
+
+        # A pool manager built by the generated client is sized like the pool of the session
+        pool_kw = session.get_adapter('https://').poolmanager.connection_pool_kw
+        configuration.connection_pool_maxsize = pool_kw.get('maxsize', configuration.connection_pool_maxsize)
+
+        return bool(proxy) or session.verify is not True or session.cert is not None
+
+    def _refresh_token(self):
+        self._digikeyApiToken = _get_or_refresh_token(self.x_digikey_client_id, self._client_secret,
+                                                      self._storage_path, self.sandbox)
+
+        # Only rebuild the authorization header when the access token actually rotated
+        if self._digikeyApiToken.access_token != self._cached_access_token:
+            self._api_instance.api_client.configuration.access_token = self._digikeyApiToken.access_token
+            self.authorization = self._digikeyApiToken.get_authorization()
+            self._cached_access_token = self._digikeyApiToken.access_token
+
+    def _remaining_requests(self, header, api_limits):
+        # Not every endpoint returns rate limit headers
+        rate_limit = header.get('X-RateLimit-Limit')
+        rate_limit_rem = header.get('X-RateLimit-Remaining')
+        if rate_limit is None or rate_limit_rem is None:
+            logger.debug('No api limits returned')
+            if isinstance(api_limits, dict):
                 api_limits['api_requests_limit'] = None
                 api_limits['api_requests_remaining'] = None
+            return
+
+        try:
+            rate_limit = int(rate_limit)
+            rate_limit_rem = int(rate_limit_rem)
+        except ValueError as e:
+            logger.debug('Malformed api limits returned -> %s', e)
+            rate_limit = rate_limit_rem = None
+        else:
+            self._state.rate_state.update(rate_limit, rate_limit_rem, header.get('X-RateLimit-Reset'))
+            logger.debug('Requests remaining: [%s/%s]', rate_limit_rem, rate_limit)
+
+        if isinstance(api_limits, dict):
+            api_limits['api_requests_limit'] = rate_limit
+            api_limits['api_requests_remaining'] = rate_limit_rem
 
     @staticmethod
     def _store_api_statuscode(statuscode, status):
-        if status is not None and type(status) == dict:
+        if isinstance(status, dict):
             status['code'] = int(statuscode)
 
-        logger.debug('API returned code: {}'.format(statuscode))
-
-    def call_api_function(self, *args, **kwargs):
-        try:
-            # If optional api_limits, status mutable object is passed use it to store API limits and status code
-            api_limits = kwargs.pop('api_limits', None)
-            status = kwargs.pop('status', None)
-
-            func = getattr(self._api_instance, self.wrapped_function)
-            logger.debug(f'CALL wrapped -> {func.__qualname__}')
-            api_response = func(*args, self.x_digikey_client_id, authorization = self.authorization, **kwargs)
-            self._remaining_requests(api_response[2], api_limits)
-            self._store_api_statuscode(api_response[1], status)
-
-            return api_response[0]
-        except ApiException as e:
-            logger.error(f'Exception when calling {self.wrapped_function}: {e}')
-            self._store_api_statuscode(e.status, status)
+        logger.debug('API returned code: %s', statuscode)
 
+    @staticmethod
+    def _is_rate_limited(e):
+        if e.status in (429, 503):
+            return True
+        body = str(e.body).lower()
+        return 'rate limit' in body or 'quota' in body
+
+    def _retry_delay(self, e, attempt):
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt)
+
+        # Retry-After is either a number of seconds or an HTTP date
+        retry_after = e.headers.get('Retry-After') if e.headers else None
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    pass
+
+        return max(0.0, delay)
 
-def keyword_search(*args, **kwargs) -> KeywordResponse:
-    client = DigikeyApiWrapper('keyword_search_with_http_info', digikey.v4.productinformation)
+    @staticmethod
+    def _etag_key(args, kwargs):
+        try:
+            key = (args, frozenset(kwargs.items()))
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _get_cached(self, key):
+        with self._etag_lock:
+            cached = self._etag_cache.get(key)
+            if cached is not None:
+                self._etag_cache.move_to_end(key)
+            return cached
+
+    def _store_cached(self, key, etag, response):
+        with self._etag_lock:
+            # Keep a private copy, callers are free to modify the models they get back
+            self._etag_cache[key] = (etag, copy.deepcopy(response))
+            self._etag_cache.move_to_end(key)
+            while len(self._etag_cache) > self.etag_cache_size:
+                self._etag_cache.popitem(last=False)
+
+    def _dispatch(self, func, etag, *args, **kwargs):
+        throttled = False
+        self._state.concurrency.acquire()
+        start = time.monotonic()
+        try:
+            with self._request_headers.extra({'If-None-Match': etag} if etag is not None else None):
+                return func(*args, self.x_digikey_client_id, authorization = self.authorization, **kwargs)
+        except _API_EXCEPTIONS as e:
+            throttled = e.status == 502 or self._is_rate_limited(e)
+            raise
+        finally:
+            self._state.concurrency.release(time.monotonic() - start, throttled)
 
-    if 'body' in kwargs and type(kwargs['body']) == KeywordRequest:
-        logger.info(f'Search for: {kwargs["body"].keywords}')
-        logger.debug('CALL -> keyword_search')
-        return client.call_api_function(*args, **kwargs)
-    else:
-        raise DigikeyError('Please provide a valid KeywordSearchRequest argument')
+    def call_api_function(self, *args, **kwargs):
+        # If optional api_limits, status mutable object is passed use it to store API limits and status code
+        api_limits = kwargs.pop('api_limits', None)
+        status = kwargs.pop('status', None)
+
+        # Long-lived wrappers pick up a fresh token once the current one expires
+        if self._digikeyApiToken.expired():
+            self._refresh_token()
+
+        # Revalidate a previously cached response instead of downloading it again
+        cache_key = self._etag_key(args, kwargs) if self._etag_cache is not None else None
+        cached = self._get_cached(cache_key) if cache_key is not None else None
+        etag = cached[0] if cached is not None else None
+
+        func = self._func
+        # Set once this call closed the gate, it is opened again however the call ends
+        gate_closed = False
+        try:
+            for attempt in range(self.max_retries):
+                # New calls wait until the probing call succeeds instead of adding to the rate limited traffic
+                if attempt == 0:
+                    self._state.wait_clear_to_send(timeout=self.retry_max_delay)
+
+                try:
+                    self._state.rate_state.wait()
+                    logger.debug('CALL wrapped -> %s', func.__qualname__)
+                    if attempt:
+                        with self._state.probe_lock:
+                            api_response = self._dispatch(func, etag, *args, **kwargs)
+                    else:
+                        api_response = self._dispatch(func, etag, *args, **kwargs)
+                    self._state.clear_to_send.set()
+                    self._remaining_requests(api_response[2], api_limits)
+                    self._store_api_statuscode(api_response[1], status)
+
+                    response_etag = api_response[2].get('ETag')
+                    if cache_key is not None and response_etag is not None:
+                        self._store_cached(cache_key, response_etag, api_response[0])
+
+                    return api_response[0]
+                except _API_EXCEPTIONS as e:
+                    # Not modified, the generated client raises on any non 2xx status
+                    if e.status == 304 and cached is not None:
+                        self._state.clear_to_send.set()
+                        self._remaining_requests(e.headers or {}, api_limits)
+                        self._store_api_statuscode(e.status, status)
+                        return copy.deepcopy(cached[1])
+
+                    if self._is_rate_limited(e) and attempt < self.max_retries - 1:
+                        delay = self._retry_delay(e, attempt)
+                        if delay <= self.retry_after_max_delay:
+                            self._state.retry_at = time.monotonic() + delay
+                            self._state.clear_to_send.clear()
+                            gate_closed = True
+                            logger.warning('Rate limited when calling %s, retrying in %.1f seconds',
+                                           self.wrapped_function_name, delay)
+                            time.sleep(delay)
+                            continue
+                        logger.warning('Rate limited when calling %s, not retrying after %.0f seconds',
+                                       self.wrapped_function_name, delay)
+
+                    logger.error('Exception when calling %s: %s', self.wrapped_function_name, e)
+                    self._store_api_statuscode(e.status, status)
+                    return None
+        finally:
+            # A probing call that gives up or fails lets the waiting calls through again
+            if gate_closed:
+                self._state.clear_to_send.set()
+
+
+class DigikeyApi(object):
+    """
+    Client for the Digikey API V4. Credentials, the token storage path and the sandbox flag fall back to the
+    DIGIKEY_CLIENT_ID, DIGIKEY_CLIENT_SECRET, DIGIKEY_STORAGE_PATH and DIGIKEY_CLIENT_SANDBOX environment variables.
+
+    By default all clients share one connection pool. Pass a requests.Session to use the connection pool of its
+    https:// adapter instead, i.e. to tune pool_connections and pool_maxsize with a custom HTTPAdapter. The https
+    proxy and the verify and cert settings of the session are applied as well, the API client then builds its own
+    pool of the same size. Its headers and the adapter's max_retries are not used, and a warning is logged when any
+    of them is set.
+    """
+    __slots__ = ('client_id', 'client_secret', 'storage_path', 'client_sandbox', '_session', '_wrappers',
+                 '_wrappers_lock')
+
+    def __init__(self,
+                 client_id: t.Optional[str] = None,
+                 client_secret: t.Optional[str] = None,
+                 storage_path: t.Optional[str] = None,
+                 client_sandbox: t.Optional[bool] = None,
+                 session: t.Optional[requests.Session] = None):
+        self.client_id = client_id or os.getenv('DIGIKEY_CLIENT_ID')
+        self.client_secret = client_secret or os.getenv('DIGIKEY_CLIENT_SECRET')
+        if not self.client_id or not self.client_secret:
+            raise DigikeyError(_CREDENTIALS_ERROR)
+        self.storage_path = storage_path or os.getenv('DIGIKEY_STORAGE_PATH')
 
+        # Use normal API by default, if DIGIKEY_CLIENT_SANDBOX is True use sandbox API
+        if client_sandbox is None:
+            try:
+                client_sandbox = bool(strtobool(os.getenv('DIGIKEY_CLIENT_SANDBOX')))
+            except (ValueError, AttributeError):
+                client_sandbox = False
+        self.client_sandbox = client_sandbox
+        self._session = session
+        if session is not None:
+            self._check_session(session)
+
+        # Wrappers are reused across calls, keyed by (module, wrapped function name)
+        self._wrappers: t.Dict[t.Tuple[t.Any, str], _DigikeyApiWrapper] = {}
+        self._wrappers_lock = threading.Lock()
 
-def product_details(*args, **kwargs) -> ProductDetails:
-    client = DigikeyApiWrapper('product_details_with_http_info', digikey.v4.productinformation)
+    @staticmethod
+    def _check_session(session):
+        try:
+            adapter = session.get_adapter('https://')
+        except requests.exceptions.InvalidSchema:
+            adapter = None
+        if not hasattr(adapter, 'poolmanager') or not hasattr(adapter, 'max_retries'):
+            raise DigikeyError('The https:// adapter of the session must be a requests HTTPAdapter')
+        if isinstance(session.verify, str) and os.path.isdir(session.verify):
+            raise DigikeyError('The verify setting of the session must be a CA bundle file, not a directory')
+
+        ignored = []
+        if session.headers != requests.utils.default_headers():
+            ignored.append('headers')
+        if adapter.max_retries.total:
+            ignored.append('max_retries')
+
+        if ignored:
+            logger.warning('The connection pool, proxy and TLS settings of the session are used, ignoring: %s',
+                           ', '.join(ignored))
+
+    def _get_wrapper(self, wrapped_function_name, module) -> _DigikeyApiWrapper:
+        key = (module, wrapped_function_name)
+        wrapper = self._wrappers.get(key)
+        if wrapper is None:
+            # Calls from multiple threads must not build the same wrapper twice
+            with self._wrappers_lock:
+                wrapper = self._wrappers.get(key)
+                if wrapper is None:
+                    wrapper = _DigikeyApiWrapper(wrapped_function_name, module, self.client_id, self.client_secret,
+                                                 self.storage_path, self.client_sandbox, self._session)
+                    self._wrappers[key] = wrapper
+        return wrapper
+
+    def _call(self, endpoint, *args, **kwargs):
+        wrapped_function_name, module = _ENDPOINTS[endpoint]
+        return self._get_wrapper(wrapped_function_name, module).call_api_function(*args, **kwargs)
+
+    def keyword_search(self, *args, **kwargs) -> KeywordResponse:
+        if not isinstance(kwargs.get('body'), KeywordRequest):
+            raise DigikeyError('Please provide a valid KeywordSearchRequest argument')
+        logger.info('Search for: %s', kwargs['body'].keywords)
+        return self._call('keyword_search', *args, **kwargs)
+
+    def product_details(self, *args, **kwargs) -> ProductDetails:
+        if len(args):
+            logger.info('Get product details for: %s', args[0])
+            return self._call('product_details', *args, **kwargs)
+
+    def digi_reel_pricing(self, *args, **kwargs) -> DigiReelPricing:
+        if len(args):
+            logger.info('Calculate the DigiReel pricing for %s with quantity %s', args[0], args[1])
+            return self._call('digi_reel_pricing', *args, **kwargs)
+
+    def suggested_parts(self, *args, **kwargs) -> ProductDetails:
+        if len(args):
+            logger.info('Retrieve detailed product information and two suggested products for: %s', args[0])
+            return self._call('suggested_parts', *args, **kwargs)
+
+    def status_salesorder_id(self, *args, **kwargs) -> OrderStatusResponse:
+        if len(args):
+            logger.info('Get order details for: %s', args[0])
+            return self._call('status_salesorder_id', *args, **kwargs)
+
+    def salesorder_history(self, *args, **kwargs) -> [SalesOrderHistoryItem]:
+        if not (isinstance(kwargs.get('start_date'), str) and isinstance(kwargs.get('end_date'), str)):
+            raise DigikeyError('Please provide valid start_date and end_date strings')
+        logger.info('Searching for orders in date range %s to %s', kwargs['start_date'], kwargs['end_date'])
+        return self._call('salesorder_history', *args, **kwargs)
+
+    def batch_product_details(self, *args, **kwargs) -> BatchProductDetailsResponse:
+        if not isinstance(kwargs.get('body'), BatchProductDetailsRequest):
+            raise DigikeyError('Please provide a valid BatchProductDetailsRequest argument')
+        logger.info('Batch product search: %s', kwargs['body'].products)
+        return self._call('batch_product_details', *args, **kwargs)
+
+    def batch_product_details_chunked(self, *args, chunk_size: int = 50, parallelism: int = 4,
+                                      **kwargs) -> BatchProductDetailsResponse:
+        """
+        Splits a BatchProductDetailsRequest into requests of at most chunk_size products and runs them on up to
+        `parallelism` threads, subject to the rate limiting and concurrency control of this client. The product
+        details and errors of all chunks are merged into a single response. Chunks that fail add an error listing
+        their products, and the status code of the first failed chunk is stored in the optional status dict.
+        """
+        if chunk_size < 1 or parallelism < 1:
+            raise DigikeyError('Please provide a chunk_size and parallelism of at least 1')
+
+        body = kwargs.pop('body', None)
+        if not isinstance(body, BatchProductDetailsRequest):
+            raise DigikeyError('Please provide a valid BatchProductDetailsRequest argument')
+        api_limits = kwargs.pop('api_limits', None)
+        status = kwargs.pop('status', None)
+
+        products = body.products or []
+        chunks = [BatchProductDetailsRequest(products=products[i:i + chunk_size])
+                  for i in range(0, len(products), chunk_size)]
+
+        # Every chunk gets its own status and api limits, the chunks run in parallel
+        def call_chunk(chunk):
+            chunk_limits, chunk_status = {}, {}
+            response = self.batch_product_details(*args, body=chunk, api_limits=chunk_limits, status=chunk_status,
+                                                  **kwargs)
+            return response, chunk_limits, chunk_status
+
+        with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='digikey-batch') as executor:
+            responses = list(executor.map(call_chunk, chunks))
+
+        result = BatchProductDetailsResponse(product_details=[], errors=[])
+        codes = []
+        for chunk, (response, chunk_limits, chunk_status) in zip(chunks, responses):
+            code = chunk_status.get('code')
+            codes.append(code)
+            if response is None:
+                result.errors.append(f'Batch request failed with status {code} for products: '
+                                     f'{", ".join(chunk.products)}')
+            else:
+                result.product_details.extend(response.product_details or [])
+                result.errors.extend(response.errors or [])
+
+        if isinstance(status, dict) and codes:
+            status['code'] = next((code for code in codes if code is None or not 200 <= code <= 299), codes[0])
+
+        if isinstance(api_limits, dict) and responses:
+            # Report the most recent view of the limits, i.e. the lowest number of remaining requests
+            limits = [chunk_limits for _, chunk_limits, _ in responses
+                      if chunk_limits.get('api_requests_remaining') is not None]
+            if limits:
+                api_limits.update(min(limits, key=lambda chunk_limits: chunk_limits['api_requests_remaining']))
+            else:
+                api_limits['api_requests_limit'] = None
+                api_limits['api_requests_remaining'] = None
 
-    if len(args):
-        logger.info(f'Get product details for: {args[0]}')
-        return client.call_api_function(*args, **kwargs)
+        return result
 
 
-def digi_reel_pricing(*args, **kwargs) -> DigiReelPricing:
-    client = DigikeyApiWrapper('digi_reel_pricing_with_http_info', digikey.v4.productinformation)
+class AsyncDigikeyApi(object):
+    """
+    asyncio interface to the Digikey API. Calls run on a thread pool against a single DigikeyApi instance, so they
+    share its connection pool, access token, rate limiting and concurrency control. At most `concurrency` calls are
+    in flight at the same time.
+    """
+    __slots__ = ('_api', '_executor')
 
-    if len(args):
-        logger.info(f'Calculate the DigiReel pricing for {args[0]} with quantity {args[1]}')
-        return client.call_api_function(*args, **kwargs)
+    def __init__(self,
+                 client_id: t.Optional[str] = None,
+                 client_secret: t.Optional[str] = None,
+                 storage_path: t.Optional[str] = None,
+                 client_sandbox: t.Optional[bool] = None,
+                 session: t.Optional[requests.Session] = None,
+                 concurrency: int = 10):
+        self._api = DigikeyApi(client_id, client_secret, storage_path, client_sandbox, session)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='digikey')
 
+    async def _acall(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
 
-def suggested_parts(*args, **kwargs) -> ProductDetails:
-    client = DigikeyApiWrapper('suggested_parts_with_http_info', digikey.v4.productinformation)
+    async def keyword_search(self, *args, **kwargs) -> KeywordResponse:
+        return await self._acall(self._api.keyword_search, *args, **kwargs)
 
-    if len(args):
-        logger.info(f'Retrieve detailed product information and two suggested products for: {args[0]}')
-        return client.call_api_function(*args, **kwargs)
+    async def product_details(self, *args, **kwargs) -> ProductDetails:
+        return await self._acall(self._api.product_details, *args, **kwargs)
 
+    async def digi_reel_pricing(self, *args, **kwargs) -> DigiReelPricing:
+        return await self._acall(self._api.digi_reel_pricing, *args, **kwargs)
 
-def status_salesorder_id(*args, **kwargs) -> OrderStatusResponse:
-    client = DigikeyApiWrapper('order_status_with_http_info', digikey.v4.ordersupport)
+    async def suggested_parts(self, *args, **kwargs) -> ProductDetails:
+        return await self._acall(self._api.suggested_parts, *args, **kwargs)
 
-    if len(args):
-        logger.info(f'Get order details for: {args[0]}')
-        return client.call_api_function(*args, **kwargs)
+    async def status_salesorder_id(self, *args, **kwargs) -> OrderStatusResponse:
+        return await self._acall(self._api.status_salesorder_id, *args, **kwargs)
 
+    async def salesorder_history(self, *args, **kwargs) -> [SalesOrderHistoryItem]:
+        return await self._acall(self._api.salesorder_history, *args, **kwargs)
 
-def salesorder_history(*args, **kwargs) -> [SalesOrderHistoryItem]:
-    client = DigikeyApiWrapper('order_history_with_http_info', digikey.v4.ordersupport)
+    async def batch_product_details(self, *args, **kwargs) -> BatchProductDetailsResponse:
+        return await self._acall(self._api.batch_product_details, *args, **kwargs)
 
-    if 'start_date' in kwargs and type(kwargs['start_date']) == str \
-            and 'end_date' in kwargs and type(kwargs['end_date']) == str:
-        logger.info(f'Searching for orders in date range ' + kwargs['start_date'] + ' to ' + kwargs['end_date'])
-        return client.call_api_function(*args, **kwargs)
-    else:
-        raise DigikeyError('Please provide valid start_date and end_date strings')
+    async def batch_product_details_chunked(self, *args, **kwargs) -> BatchProductDetailsResponse:
+        return await self._acall(self._api.batch_product_details_chunked, *args, **kwargs)
 
+    async def aclose(self):
+        self._executor.shutdown(wait=False)
 
-def batch_product_details(*args, **kwargs) -> BatchProductDetailsResponse:
-    client = DigikeyApiWrapper('batch_product_details_with_http_info', digikey.v4.batchproductdetails)
+    async def __aenter__(self):
+        return self
 
-    if 'body' in kwargs and type(kwargs['body']) == BatchProductDetailsRequest:
-        logger.info(f'Batch product search: {kwargs["body"].products}')
-        logger.debug('CALL -> batch_product_details')
-        return client.call_api_function(*args, **kwargs)
-    else:
-        raise DigikeyError('Please provide a valid BatchProductDetailsRequest argument')
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
@@ -0,0 +1,529 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import unittest.mock as mock
+from unittest import TestCase
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+import digikey.v4.productinformation
+from digikey.exceptions import DigikeyError
+from digikey.oauth import oauth2
+from digikey.v4 import api
+from digikey.v4.batchproductdetails import BatchProductDetailsRequest, BatchProductDetailsResponse
+from digikey.v4.productinformation.rest import ApiException
+
+logger = logging.getLogger(__name__)
+logger.level = logging.DEBUG
+
+
+def mock_token(access_token='MOCK_ACCESS', expires_in=3600):
+    return oauth2.Oauth2Token({'access_token': access_token,
+                               'refresh_token': 'MOCK_REFRESH',
+                               'token_type': 'Bearer',
+                               'expires': time.time() + expires_in})
+
+
+def mock_wrapper(wrapped_function_name='product_details_with_http_info', module=digikey.v4.productinformation,
+                 token=None):
+    with mock.patch('digikey.v4.api._get_or_refresh_token', return_value=token or mock_token()):
+        wrapper = api._DigikeyApiWrapper(wrapped_function_name, module, 'MOCK_CLIENT_ID', 'MOCK_CLIENT_SECRET',
+                                         '.', False)
+    wrapper._func = mock.Mock(__qualname__=wrapped_function_name)
+    return wrapper
+
+
+def mock_api_exception(status, headers=None):
+    return ApiException(http_resp=mock.Mock(status=status, reason='MOCK', data=b'',
+                                            getheaders=mock.Mock(return_value=headers or {})))
+
+
+class ConcurrencyControllerTests(TestCase):
+    def setUp(self):
+        self.stream_handler = logging.StreamHandler(sys.stdout)
+        logger.addHandler(self.stream_handler)
+
+    def tearDown(self):
+        logger.removeHandler(self.stream_handler)
+
+    def test_slow_calls_need_min_samples(self):
+        """Tests that slow calls only decrease the concurrency once enough latencies have been measured"""
+        controller = api._ConcurrencyController(concurrency=4)
+
+        for _ in range(controller.min_samples - 1):
+            controller.acquire()
+            controller.release(controller.target_latency * 2)
+        assert controller.concurrency == 4
+
+        controller.acquire()
+        controller.release(controller.target_latency * 2)
+        assert controller.concurrency == 2
+
+        # The window was cleared, a single slow call does not halve the limit again
+        controller.acquire()
+        controller.release(controller.target_latency * 2)
+        assert controller.concurrency == 2
+
+    def test_throttled_call_decreases_immediately(self):
+        """Tests that a rate limited call halves the concurrency right away"""
+        controller = api._ConcurrencyController(concurrency=4)
+
+        controller.acquire()
+        controller.release(0.1, throttled=True)
+        assert controller.concurrency == 2
+
+    def test_fast_calls_increase(self):
+        """Tests that fast calls additively increase the concurrency up to the maximum"""
+        controller = api._ConcurrencyController(concurrency=4)
+
+        controller.acquire()
+        controller.release(0.1)
+        assert controller.concurrency == 4.5
+
+        for _ in range(100):
+            controller.acquire()
+            controller.release(0.1)
+        assert controller.concurrency == controller.max_concurrency
+
+
+class RateLimitProbeTests(TestCase):
+    def setUp(self):
+        api._CLIENT_STATES.clear()
+
+    def test_new_calls_wait_while_rate_limited(self):
+        """Tests that new calls block while another call is rate limited, until the limited state is released"""
+        wrapper = mock_wrapper()
+        wrapper._func.return_value = ('MOCK_RESULT', 200, {})
+        state = api._get_client_state('MOCK_CLIENT_ID', False)
+        state.retry_at = time.monotonic()
+        state.clear_to_send.clear()
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(wrapper.call_api_function('MOCK_PART')))
+        thread.start()
+        thread.join(timeout=0.3)
+        assert thread.is_alive()
+        assert not wrapper._func.called
+
+        state.clear_to_send.set()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert results == ['MOCK_RESULT']
+
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_rate_limited_call_blocks_others_until_success(self, mock_sleep):
+        """Tests that a rate limited call clears the send state and sets it again once its retry succeeds"""
+        wrapper = mock_wrapper()
+        state = api._get_client_state('MOCK_CLIENT_ID', False)
+
+        def rate_limited_once(*args, **kwargs):
+            if wrapper._func.call_count == 1:
+                raise mock_api_exception(429, {'Retry-After': '1'})
+            assert not state.clear_to_send.is_set()
+            return 'MOCK_RESULT', 200, {}
+
+        wrapper._func.side_effect = rate_limited_once
+        assert wrapper.call_api_function('MOCK_PART') == 'MOCK_RESULT'
+        assert state.clear_to_send.is_set()
+
+    def test_wait_follows_retry_delay(self):
+        """Tests that new calls keep waiting until the retry of the probing call is due, past the timeout"""
+        state = api._get_client_state('MOCK_CLIENT_ID', False)
+        state.retry_at = time.monotonic() + 0.3
+        state.clear_to_send.clear()
+
+        start = time.monotonic()
+        state.wait_clear_to_send(timeout=0.1)
+        assert time.monotonic() - start >= 0.3
+        assert not state.clear_to_send.is_set()
+
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_failed_probe_releases_others(self, mock_sleep):
+        """Tests that the send state is set again when the retry of a rate limited call raises another error"""
+        wrapper = mock_wrapper()
+        wrapper._func.side_effect = [mock_api_exception(429), urllib3.exceptions.ProtocolError('MOCK')]
+
+        with self.assertRaises(urllib3.exceptions.ProtocolError):
+            wrapper.call_api_function('MOCK_PART')
+        assert api._get_client_state('MOCK_CLIENT_ID', False).clear_to_send.is_set()
+
+
+class ETagCacheTests(TestCase):
+    def setUp(self):
+        api._CLIENT_STATES.clear()
+
+    def test_etag_stored_and_revalidated(self):
+        """Tests that a 200 stores the ETag, and a 304 returns the cached response"""
+        wrapper = mock_wrapper()
+        wrapper._func.return_value = ({'part': 'MOCK_PART'}, 200, {'ETag': '"MOCK_ETAG"'})
+
+        assert wrapper.call_api_function('MOCK_PART') == {'part': 'MOCK_PART'}
+        assert wrapper._etag_cache[(('MOCK_PART',), frozenset())][0] == '"MOCK_ETAG"'
+
+        def not_modified(*args, **kwargs):
+            assert wrapper._request_headers['If-None-Match'] == '"MOCK_ETAG"'
+            raise mock_api_exception(304)
+
+        wrapper._func.side_effect = not_modified
+        status = {}
+        assert wrapper.call_api_function('MOCK_PART', status=status) == {'part': 'MOCK_PART'}
+        assert status['code'] == 304
+
+        # The extra header only applies to the conditional request
+        assert 'If-None-Match' not in wrapper._request_headers
+
+    def test_cached_response_is_a_copy(self):
+        """Tests that modifying a returned response does not change what later callers get"""
+        wrapper = mock_wrapper()
+        wrapper._func.return_value = ({'part': 'MOCK_PART'}, 200, {'ETag': '"MOCK_ETAG"'})
+
+        first = wrapper.call_api_function('MOCK_PART')
+        first['part'] = 'MODIFIED'
+
+        wrapper._func.side_effect = mock_api_exception(304)
+        second = wrapper.call_api_function('MOCK_PART')
+        assert second == {'part': 'MOCK_PART'}
+
+        second['part'] = 'MODIFIED'
+        assert wrapper.call_api_function('MOCK_PART') == {'part': 'MOCK_PART'}
+
+    def test_no_cache_for_search(self):
+        """Tests that only lookup endpoints cache their responses"""
+        wrapper = mock_wrapper('keyword_search_with_http_info')
+        assert wrapper._etag_cache is None
+
+
+class BatchProductDetailsChunkedTests(TestCase):
+    def setUp(self):
+        self.dk = api.DigikeyApi('MOCK_CLIENT_ID', 'MOCK_CLIENT_SECRET', '.', False)
+
+    @staticmethod
+    def mock_batch_product_details(*args, body=None, api_limits=None, status=None):
+        if 'FAIL' in body.products:
+            status['code'] = 400
+            return None
+
+        api_limits['api_requests_limit'] = 1000
+        api_limits['api_requests_remaining'] = 1000 - len(body.products)
+        status['code'] = 200
+        return BatchProductDetailsResponse(product_details=list(body.products),
+                                           errors=[f'MOCK_ERROR {body.products[0]}'])
+
+    def test_split_and_merge(self):
+        """Tests that a large request is split in chunks and the responses are merged in order"""
+        products = [f'PART{i}' for i in range(7)]
+        api_limits = {}
+        status = {}
+
+        with mock.patch.object(api.DigikeyApi, 'batch_product_details',
+                               side_effect=self.mock_batch_product_details) as mock_batch:
+            result = self.dk.batch_product_details_chunked(body=BatchProductDetailsRequest(products=products),
+                                                           chunk_size=3, parallelism=2,
+                                                           api_limits=api_limits, status=status)
+
+        chunks = [call[1]['body'].products for call in mock_batch.call_args_list]
+        assert sorted(chunks) == [['PART0', 'PART1', 'PART2'], ['PART3', 'PART4', 'PART5'], ['PART6']]
+        assert result.product_details == products
+        assert result.errors == ['MOCK_ERROR PART0', 'MOCK_ERROR PART3', 'MOCK_ERROR PART6']
+        assert status == {'code': 200}
+        assert api_limits == {'api_requests_limit': 1000, 'api_requests_remaining': 997}
+
+    def test_failed_chunk_is_reported(self):
+        """Tests that the products of a failed chunk end up in the errors and its status code is stored"""
+        status = {}
+
+        with mock.patch.object(api.DigikeyApi, 'batch_product_details',
+                               side_effect=self.mock_batch_product_details):
+            result = self.dk.batch_product_details_chunked(
+                body=BatchProductDetailsRequest(products=['PART0', 'PART1', 'FAIL', 'PART3']),
+                chunk_size=2, status=status)
+
+        assert result.product_details == ['PART0', 'PART1']
+        assert result.errors == ['MOCK_ERROR PART0', 'Batch request failed with status 400 for products: FAIL, PART3']
+        assert status == {'code': 400}
+
+    def test_invalid_arguments(self):
+        """Tests that chunk_size and parallelism must be at least 1"""
+        body = BatchProductDetailsRequest(products=['PART0'])
+        for kwargs in [{'chunk_size': 0}, {'chunk_size': -1}, {'parallelism': 0}]:
+            with self.assertRaises(DigikeyError):
+                self.dk.batch_product_details_chunked(body=body, **kwargs)
+
+
+class DigikeyApiTests(TestCase):
+    def test_wrapper_reused(self):
+        """Tests that repeated calls to the same endpoint reuse one wrapper"""
+        dk = api.DigikeyApi('MOCK_CLIENT_ID', 'MOCK_CLIENT_SECRET', '.', False)
+        with mock.patch('digikey.v4.api._get_or_refresh_token', return_value=mock_token()) as mock_get_token:
+            wrapper = dk._get_wrapper('product_details_with_http_info', digikey.v4.productinformation)
+            assert dk._get_wrapper('product_details_with_http_info', digikey.v4.productinformation) is wrapper
+        mock_get_token.assert_called_once()
+
+    @mock.patch.dict('os.environ', {}, clear=True)
+    def test_empty_credentials_rejected(self):
+        """Tests that empty credentials raise a DigikeyError before a token is requested"""
+        with mock.patch('digikey.v4.api._get_or_refresh_token') as mock_get_token:
+            with self.assertRaises(DigikeyError):
+                api.DigikeyApi('', '')
+            with self.assertRaises(DigikeyError):
+                api._DigikeyApiWrapper('product_details_with_http_info', digikey.v4.productinformation, '', '', '.')
+        mock_get_token.assert_not_called()
+
+    def test_call_dispatches_through_endpoints(self):
+        """Tests that public methods call the wrapped function and module from the endpoint table"""
+        dk = api.DigikeyApi('MOCK_CLIENT_ID', 'MOCK_CLIENT_SECRET', '.', False)
+        with mock.patch.object(api.DigikeyApi, '_get_wrapper') as mock_get_wrapper:
+            mock_get_wrapper.return_value.call_api_function.return_value = 'MOCK_RESULT'
+            assert dk.product_details('MOCK_PART', includes='MOCK_INCLUDES') == 'MOCK_RESULT'
+
+        mock_get_wrapper.assert_called_once_with(*api._ENDPOINTS['product_details'])
+        assert mock_get_wrapper.call_args[0] == ('product_details_with_http_info', digikey.v4.productinformation)
+        mock_get_wrapper.return_value.call_api_function.assert_called_once_with('MOCK_PART', includes='MOCK_INCLUDES')
+
+
+class SessionTests(TestCase):
+    def test_default_session_uses_pool(self):
+        """Tests that a session with default settings is accepted silently and its pool manager is used"""
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_maxsize=32))
+
+        with mock.patch.object(api.logger, 'warning') as mock_warning:
+            dk = api.DigikeyApi('MOCK_CLIENT_ID', 'MOCK_CLIENT_SECRET', '.', False, session=session)
+        mock_warning.assert_not_called()
+
+        with mock.patch('digikey.v4.api._get_or_refresh_token', return_value=mock_token()):
+            wrapper = dk._get_wrapper('product_details_with_http_info', digikey.v4.productinformation)
+        assert wrapper._api_instance.api_client.rest_client.pool_manager is session.get_adapter('https://').poolmanager
+
+    def test_proxy_and_tls_settings_applied(self):
+        """Tests that the proxy, verify and cert settings of the session are used by the API client"""
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_maxsize=32))
+        session.proxies = {'https': 'http://localhost:3128'}
+        session.verify = False
+        session.cert = ('MOCK_CERT', 'MOCK_KEY')
+
+        dk = api.DigikeyApi('MOCK_CLIENT_ID', 'MOCK_CLIENT_SECRET', '.', False, session=session)
+        with mock.patch('digikey.v4.api._get_or_refresh_token', return_value=mock_token()):
+            wrapper = dk._get_wrapper('product_details_with_http_info', digikey.v4.productinformation)
+
+        configuration = wrapper._api_instance.api_client.configuration
+        assert configuration.proxy == 'http://localhost:3128'
+        assert not configuration.verify_ssl
+        assert (configuration.cert_file, configuration.key_file) == ('MOCK_CERT', 'MOCK_KEY')
+
+        pool_manager = wrapper._api_instance.api_client.rest_client.pool_manager
+        assert isinstance(pool_manager, urllib3.ProxyManager)
+        assert pool_manager.connection_pool_kw['maxsize'] == 32
+
+    def test_ignored_session_settings_warn(self):
+        """Tests that session settings that are not used are reported"""
+        session = requests.Session()
+        session.headers['X-MOCK'] = 'MOCK'
+
+        with self.assertLogs('digikey.v4.api', level='WARNING') as logs:
+            api.DigikeyApi('MOCK_CLIENT_ID', 'MOCK_CLIENT_SECRET', '.', False, session=session)
+        assert 'ignoring: headers' in logs.output[0]
+
+    def test_custom_adapter_rejected(self):
+        """Tests that a session without a requests HTTPAdapter for https:// is rejected up front"""
+        session = requests.Session()
+        session.mount('https://', requests.adapters.BaseAdapter())
+
+        with self.assertRaises(DigikeyError):
+            api.DigikeyApi('MOCK_CLIENT_ID', 'MOCK_CLIENT_SECRET', '.', False, session=session)
+
+
+class RetryTests(TestCase):
+    def setUp(self):
+        api._CLIENT_STATES.clear()
+
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_retry_after_is_honored(self, mock_sleep):
+        """Tests that a 429 is retried after the delay from the Retry-After header"""
+        wrapper = mock_wrapper()
+        wrapper._func.side_effect = [mock_api_exception(429, {'Retry-After': '2'}), ('MOCK_RESULT', 200, {})]
+
+        status = {}
+        assert wrapper.call_api_function('MOCK_PART', status=status) == 'MOCK_RESULT'
+        assert status == {'code': 200}
+        assert wrapper._func.call_count == 2
+        mock_sleep.assert_called_once_with(2.0)
+
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_long_retry_after_is_not_capped(self, mock_sleep):
+        """Tests that a Retry-After longer than the backoff cap is honored in full"""
+        wrapper = mock_wrapper()
+        wrapper._func.side_effect = [mock_api_exception(429, {'Retry-After': '60'}), ('MOCK_RESULT', 200, {})]
+
+        assert wrapper.call_api_function('MOCK_PART') == 'MOCK_RESULT'
+        mock_sleep.assert_called_once_with(60.0)
+
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_give_up_on_excessive_retry_after(self, mock_sleep):
+        """Tests that a call gives up right away when Retry-After exceeds retry_after_max_delay"""
+        wrapper = mock_wrapper()
+        wrapper._func.side_effect = mock_api_exception(429, {'Retry-After': '3600'})
+
+        status = {}
+        assert wrapper.call_api_function('MOCK_PART', status=status) is None
+        assert status == {'code': 429}
+        assert wrapper._func.call_count == 1
+        mock_sleep.assert_not_called()
+        assert api._get_client_state('MOCK_CLIENT_ID', False).clear_to_send.is_set()
+
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_give_up_after_max_retries(self, mock_sleep):
+        """Tests that a call that stays rate limited gives up after max_retries attempts"""
+        wrapper = mock_wrapper()
+        wrapper._func.side_effect = mock_api_exception(429)
+
+        status = {}
+        assert wrapper.call_api_function('MOCK_PART', status=status) is None
+        assert status == {'code': 429}
+        assert wrapper._func.call_count == wrapper.max_retries
+
+        # Exponential backoff without a Retry-After header
+        delays = [call[0][0] for call in mock_sleep.call_args_list]
+        assert delays == [wrapper.retry_base_delay * 2 ** attempt for attempt in range(wrapper.max_retries - 1)]
+
+        # Other calls are allowed to probe the API again
+        assert api._get_client_state('MOCK_CLIENT_ID', False).clear_to_send.is_set()
+
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_other_errors_are_not_retried(self, mock_sleep):
+        """Tests that errors other than rate limiting are not retried"""
+        wrapper = mock_wrapper()
+        wrapper._func.side_effect = mock_api_exception(404)
+
+        status = {}
+        assert wrapper.call_api_function('MOCK_PART', status=status) is None
+        assert status == {'code': 404}
+        assert wrapper._func.call_count == 1
+        mock_sleep.assert_not_called()
+
+
+class RateStateTests(TestCase):
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_wait_when_remaining_at_threshold(self, mock_sleep):
+        """Tests that calls wait until the reset when the remaining requests reach the threshold"""
+        rate_state = api._RateState()
+        rate_state.update(1000, 100, 30)
+        rate_state.wait()
+
+        mock_sleep.assert_called_once()
+        assert 29 <= mock_sleep.call_args[0][0] <= 30
+
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_no_wait_above_threshold(self, mock_sleep):
+        """Tests that calls are not delayed while enough requests remain"""
+        rate_state = api._RateState()
+        rate_state.update(1000, 101, 30)
+        rate_state.wait()
+
+        mock_sleep.assert_not_called()
+
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_sliding_window(self, mock_sleep):
+        """Tests that calls wait once the requests per minute are used up when no headers are returned"""
+        rate_state = api._RateState()
+        for _ in range(rate_state.requests_per_minute):
+            rate_state.wait()
+        mock_sleep.assert_not_called()
+
+        rate_state.wait()
+        mock_sleep.assert_called_once()
+
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_past_epoch_reset(self, mock_sleep):
+        """Tests that a reset epoch timestamp in the past is treated as already reset"""
+        rate_state = api._RateState()
+        rate_state.update(1000, 10, time.time() - 3600)
+        rate_state.wait()
+
+        mock_sleep.assert_not_called()
+        assert rate_state.remaining is None
+
+    @mock.patch('digikey.v4.api.time.sleep')
+    def test_exhausted_quota_warns_once(self, mock_sleep):
+        """Tests that an exhausted quota with a distant reset is only warned about once per reset window"""
+        rate_state = api._RateState()
+        rate_state.update(1000, 0, 3600)
+
+        with mock.patch.object(api.logger, 'warning') as mock_warning:
+            for _ in range(3):
+                rate_state.wait()
+            mock_warning.assert_called_once()
+
+            # A new reset window is reported again
+            rate_state.update(1000, 0, 7200)
+            rate_state.wait()
+            assert mock_warning.call_count == 2
+        mock_sleep.assert_not_called()
+
+    def test_remaining_requests_updates_state(self):
+        """Tests that the rate limit headers are stored in the api_limits dict and the rate state"""
+        api._CLIENT_STATES.clear()
+        wrapper = mock_wrapper()
+
+        api_limits = {}
+        wrapper._remaining_requests({'X-RateLimit-Limit': '1000', 'X-RateLimit-Remaining': '139'}, api_limits)
+        assert api_limits == {'api_requests_limit': 1000, 'api_requests_remaining': 139}
+        assert wrapper._state.rate_state.remaining == 139
+
+        wrapper._remaining_requests({}, api_limits)
+        assert api_limits == {'api_requests_limit': None, 'api_requests_remaining': None}
+
+
+class TokenTests(TestCase):
+    def setUp(self):
+        api._CLIENT_STATES.clear()
+        api._TOKEN_CACHE.clear()
+
+    def test_token_rotation_updates_authorization(self):
+        """Tests that an expired token is replaced and the authorization header follows the new token"""
+        wrapper = mock_wrapper(token=mock_token('MOCK_ACCESS_OLD', expires_in=-1))
+        wrapper._func.return_value = ('MOCK_RESULT', 200, {})
+        assert wrapper.authorization == 'Bearer MOCK_ACCESS_OLD'
+
+        with mock.patch('digikey.v4.api._get_or_refresh_token', return_value=mock_token('MOCK_ACCESS_NEW')):
+            wrapper.call_api_function('MOCK_PART')
+
+        assert wrapper.authorization == 'Bearer MOCK_ACCESS_NEW'
+        assert wrapper._api_instance.api_client.configuration.access_token == 'MOCK_ACCESS_NEW'
+        assert wrapper._func.call_args[1]['authorization'] == 'Bearer MOCK_ACCESS_NEW'
+
+    def test_token_cache_shared(self):
+        """Tests that the token handler is only used when no valid token is cached"""
+        with mock.patch('digikey.oauth.oauth2.TokenHandler') as mock_handler:
+            mock_handler.return_value.get_access_token.return_value = mock_token()
+            first = api._get_or_refresh_token('MOCK_CLIENT_ID', 'MOCK_CLIENT_SECRET', '.', False)
+            second = api._get_or_refresh_token('MOCK_CLIENT_ID', 'MOCK_CLIENT_SECRET', '.', False)
+
+        assert first is second
+        assert mock_handler.return_value.get_access_token.call_count == 1
+
+
+class AsyncDigikeyApiTests(TestCase):
+    def test_call_runs_on_executor(self):
+        """Tests that a call is awaited on the thread pool and aclose shuts the pool down"""
+        def product_details(self, *args, **kwargs):
+            return threading.current_thread().name, args, kwargs
+
+        async def run(async_api):
+            async with async_api:
+                return await async_api.product_details('MOCK_PART', includes='MOCK_INCLUDES')
+
+        async_api = api.AsyncDigikeyApi('MOCK_CLIENT_ID', 'MOCK_CLIENT_SECRET', '.', False)
+        with mock.patch.object(api.DigikeyApi, 'product_details', product_details):
+            thread_name, args, kwargs = asyncio.run(run(async_api))
+
+        assert thread_name.startswith('digikey')
+        assert args == ('MOCK_PART',)
+        assert kwargs == {'includes': 'MOCK_INCLUDES'}
+        with self.assertRaises(RuntimeError):
+            async_api._executor.submit(print)